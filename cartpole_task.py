@@ -5,86 +5,147 @@ CartPole-v1 solver using an analytical controller.
 Runs inside a Daytona sandbox; results are printed as JSON to stdout
 and collected by the orchestrator.
 
+All episodes are simulated at once: the CartPole-v1 dynamics are inlined
+on an (episodes, 4) NumPy state array, so each tick is a handful of
+vector ops instead of one gym.step() call per episode.
+
 Usage:
     python cartpole_task.py <sandbox_id> <episodes> <learning_rate>
 """
 
 import json
+import math
 import sys
 import time
+from collections import deque
 
 try:
-    import gymnasium as gym
+    import orjson
 except ImportError:
-    import subprocess
-    subprocess.run(
-        [sys.executable, "-m", "pip", "install", "gymnasium", "--quiet"],
-        check=True,
-    )
-    import gymnasium as gym
-
-SANDBOX_ID      = sys.argv[1] if len(sys.argv) > 1 else "unknown"
-EPISODES        = int(sys.argv[2])   if len(sys.argv) > 2 else 300
-LEARNING_RATE   = float(sys.argv[3]) if len(sys.argv) > 3 else 0.01  # unused, kept for CLI compat
-SOLVE_THRESHOLD = 195.0
+    orjson = None
 
+SOLVE_THRESHOLD = 195.0
 
-def select_action(obs):
+# CartPole-v1 constants (gymnasium.envs.classic_control.CartPoleEnv)
+GRAVITY         = 9.8
+MASS_CART       = 1.0
+MASS_POLE       = 0.1
+TOTAL_MASS      = MASS_CART + MASS_POLE
+LENGTH          = 0.5   # half the pole's length
+POLEMASS_LENGTH = MASS_POLE * LENGTH
+FORCE_MAG       = 10.0
+TAU             = 0.02  # seconds between state updates
+THETA_LIMIT     = 12 * 2 * math.pi / 360
+X_LIMIT         = 2.4
+MAX_STEPS       = 500   # TimeLimit truncation for CartPole-v1
+
+
+def select_actions(obs):
     # Push in the direction the pole is falling
-    return 1 if (obs[2] + obs[3]) > 0 else 0
-
-
-def run():
-    env = gym.make("CartPole-v1")
-
-    episode_rewards = []
-    solved_at = None
-    start = time.time()
-
-    for ep in range(1, EPISODES + 1):
-        obs, _ = env.reset()
-        total_reward = 0.0
-        done = False
-
-        while not done:
-            action = select_action(obs)
-            obs, reward, terminated, truncated, _ = env.step(action)
-            total_reward += reward
-            done = terminated or truncated
-
-        episode_rewards.append(total_reward)
-        avg_100 = sum(episode_rewards[-100:]) / min(len(episode_rewards), 100)
+    return (obs[:, 2] + obs[:, 3]) > 0
+
+
+def _simulate_vectorized(episodes, seed):
+    """Run `episodes` CartPole-v1 episodes in lockstep; returns per-episode rewards."""
+    import numpy as np  # deferred so importing this module stays cheap
+
+    rng     = np.random.default_rng(seed)
+    obs     = rng.uniform(-0.05, 0.05, size=(episodes, 4))
+    alive   = np.ones(episodes, dtype=bool)
+    rewards = np.zeros(episodes)
+
+    for _ in range(MAX_STEPS):
+        force = np.where(select_actions(obs), FORCE_MAG, -FORCE_MAG)
+        x, x_dot, theta, theta_dot = obs.T
+        costheta = np.cos(theta)
+        sintheta = np.sin(theta)
+
+        temp = (force + POLEMASS_LENGTH * theta_dot**2 * sintheta) / TOTAL_MASS
+        thetaacc = (GRAVITY * sintheta - costheta * temp) / (
+            LENGTH * (4.0 / 3.0 - MASS_POLE * costheta**2 / TOTAL_MASS)
+        )
+        xacc = temp - POLEMASS_LENGTH * thetaacc * costheta / TOTAL_MASS
+
+        obs = np.stack([
+            x + TAU * x_dot,
+            x_dot + TAU * xacc,
+            theta + TAU * theta_dot,
+            theta_dot + TAU * thetaacc,
+        ], axis=1)
+
+        # Every step that starts alive earns 1, including the terminating one
+        rewards += alive
+        alive &= (np.abs(obs[:, 0]) <= X_LIMIT) & (np.abs(obs[:, 2]) <= THETA_LIMIT)
+        if not alive.any():
+            break
+
+    return rewards
+
+
+def emit(payload):
+    # One JSON object per line on stdout, flushed so the orchestrator sees it now
+    if orjson is not None:
+        sys.stdout.buffer.write(orjson.dumps(payload) + b"\n")
+        sys.stdout.buffer.flush()
+    else:
+        print(json.dumps(payload), flush=True)
+
+
+def run(sandbox_id, episodes, learning_rate):
+    try:
+        import numpy as np
+    except ImportError as e:
+        # Report it like any other result so the orchestrator marks the error
+        emit({"sandbox_id": sandbox_id, "status": "error", "msg": f"{type(e).__name__}: {e}"})
+        return
+
+    seed = int(np.random.SeedSequence().generate_state(1)[0])
+
+    window     = deque(maxlen=100)
+    window_sum = 0.0
+    solved_at  = None
+    start      = time.time()
+
+    episode_rewards = _simulate_vectorized(episodes, seed).tolist()
+    for ep, total_reward in enumerate(episode_rewards, start=1):
+        if len(window) == window.maxlen:
+            window_sum -= window[0]
+        window.append(total_reward)
+        window_sum += total_reward
+        avg_100 = window_sum / len(window)
 
         if avg_100 >= SOLVE_THRESHOLD and solved_at is None:
             solved_at = ep
 
-        if ep % 50 == 0 or ep == EPISODES:
-            print(json.dumps({
-                "sandbox_id": SANDBOX_ID,
+        if ep % 50 == 0 or ep == episodes:
+            emit({
+                "sandbox_id": sandbox_id,
                 "episode":    ep,
                 "reward":     round(total_reward, 1),
                 "avg_100":    round(avg_100, 1),
                 "solved":     solved_at is not None,
                 "solved_at":  solved_at,
-            }), flush=True)
+            })
 
     elapsed   = round(time.time() - start, 1)
-    final_avg = round(sum(episode_rewards[-100:]) / min(len(episode_rewards), 100), 1)
+    final_avg = round(window_sum / len(window), 1)
     best      = round(max(episode_rewards), 1)
 
-    print(json.dumps({
-        "sandbox_id": SANDBOX_ID,
+    emit({
+        "sandbox_id": sandbox_id,
         "status":     "complete",
         "final_avg":  final_avg,
         "best":       best,
         "solved":     solved_at is not None,
         "solved_at":  solved_at,
         "elapsed_s":  elapsed,
-        "lr":         LEARNING_RATE,
-    }), flush=True)
-
-    env.close()
+        "lr":         learning_rate,
+    })
 
 
 if __name__ == "__main__":
-    run()
\ No newline at end of file
+    run(
+        sys.argv[1]        if len(sys.argv) > 1 else "unknown",
+        int(sys.argv[2])   if len(sys.argv) > 2 else 300,
+        float(sys.argv[3]) if len(sys.argv) > 3 else 0.01,  # unused, kept for CLI compat
+    )
\ No newline at end of file
@@ -5,15 +5,22 @@ from rich.text import Text
 from rich import box
 
 from models.demo_state import DemoState
+from models.sandbox_result import Status
 
+# (style, label) per Status, indexed by its value
+STATUS_STYLES = (
+    ("dim", "..."),
+    ("green", "> running"),
+    ("bold white", "+ done"),
+    ("red", "x error"),
+)
 
-def build_dashboard(state: DemoState, episodes: int) -> Panel:
+
+def build_dashboard(state: DemoState, episodes: int, max_rows: int = 30) -> Panel:
     elapsed = state.elapsed
     n_done  = state.n_complete
     n_run   = state.n_running
-    n_pend  = state.total - n_done - n_run - sum(
-        1 for r in state.results.values() if r.status == "error"
-    )
+    n_pend  = state.n_pending
 
     # ── Header stats ─────────────────────────────────────────────────────
     solved_pct = round(state.n_solved / max(n_done, 1) * 100, 1)
@@ -33,8 +40,9 @@ def build_dashboard(state: DemoState, episodes: int) -> Panel:
     header.append(f"avg {state.avg_final}", style="bold magenta")
 
     # ── Results table ─────────────────────────────────────────────────────
-    with state.lock:
-        sample = sorted(state.results.values(), key=lambda r: r.index)
+    # Only lay out the rows that fit; the rest collapse into one summary row.
+    # Called on the event loop that applies every update, so rows can't be torn.
+    sample = state.results[:max_rows]
 
     table = Table(
         box=box.SIMPLE_HEAD,
@@ -52,15 +60,10 @@ def build_dashboard(state: DemoState, episodes: int) -> Panel:
     table.add_column("Solved",   justify="center", width=8)
     table.add_column("LR",       justify="right",  width=8)
 
-    status_styles = {
-        "pending":  ("dim", "..."),
-        "running":  ("green", "> running"),
-        "complete": ("bold white", "+ done"),
-        "error":    ("red", "x error"),
-    }
-
+    shown = [0] * len(Status)
     for r in sample:
-        style, label = status_styles.get(r.status, ("dim", r.status))
+        shown[r.status] += 1
+        style, label = STATUS_STYLES[r.status]
         solved_icon  = "[bold green]+[/]" if r.solved else "[dim]-[/]"
         solved_ep    = f" ep{r.solved_at}" if r.solved_at else ""
         table.add_row(
@@ -74,6 +77,21 @@ def build_dashboard(state: DemoState, episodes: int) -> Panel:
             str(r.lr)      if r.lr      else "–",
         )
 
+    hidden = state.total - len(sample)
+    if hidden > 0:
+        table.add_row(
+            "…",
+            f"(+{hidden} more)",
+            f"[green]{n_run - shown[Status.RUNNING]} run[/]",
+            f"{n_done - shown[Status.COMPLETE]} done",
+            f"[red]{state.n_error - shown[Status.ERROR]} err[/]",
+            f"{n_pend - shown[Status.PENDING]} pend",
+            "",
+            "",
+            style="dim",
+            end_section=True,
+        )
+
     layout = Layout(name="root")
     layout.split_column(
         Layout(header, size=1),
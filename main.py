@@ -3,8 +3,9 @@ main.py
 -------
 Orchestration layer for the Harbor + Daytona CartPole demo.
 
-Spins up N sandboxes in parallel, uploads cartpole_task.py to each,
-runs it, and streams results into a live Rich terminal dashboard.
+Spins up N sandboxes concurrently on one asyncio event loop, runs
+cartpole_task.py in each, and streams results into a live Rich
+terminal dashboard.
 
 Usage:
     uv run streamlit run streamlit_app.py                    # web UI
@@ -12,23 +13,22 @@ Usage:
     uv run python main.py --sandboxes 100 --episodes 100
     uv run python main.py --sandboxes 25000 --episodes 100  # the big demo
     uv run python main.py --cleanup                          # delete all running sandboxes
+    uv run python main.py --local --sandboxes 25000          # same workload in-process, no sandboxes
 """
 
 import argparse
+import asyncio
 import os
 import random
 import sys
 import time
-from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from rich.console import Console
 from rich.live import Live
-from daytona_sdk import Daytona, DaytonaConfig
 
-from models import DemoState
+from models import DemoState, Status
 from dashboard import build_dashboard
-from sandbox import run_sandbox
 
 API_KEY     = os.environ.get("DAYTONA_API_KEY", "")
 TASK_SCRIPT = Path(__file__).parent / "cartpole_task.py"
@@ -36,6 +36,42 @@ TASK_SCRIPT = Path(__file__).parent / "cartpole_task.py"
 console = Console()
 
 
+def run_local(n: int, episodes: int):
+    """Simulate every sandbox's episodes in this process for a raw throughput number."""
+    import numpy as np
+    from cartpole_task import SOLVE_THRESHOLD, _simulate_vectorized
+
+    rng    = np.random.default_rng()
+    chunk  = max(1, 100_000 // episodes)           # sandboxes per _simulate_vectorized() call
+    window = np.minimum(np.arange(1, episodes + 1), 100)
+
+    n_solved, final_sum, steps = 0, 0.0, 0
+    start = time.time()
+    for lo in range(0, n, chunk):
+        rows    = min(chunk, n - lo)
+        rewards = _simulate_vectorized(rows * episodes, int(rng.integers(2**32))).reshape(rows, episodes)
+        steps  += int(rewards.sum())
+
+        # Rolling 100-episode average per sandbox, as cartpole_task.run reports it
+        csum   = np.cumsum(rewards, axis=1)
+        lagged = np.zeros_like(csum)
+        lagged[:, 100:] = csum[:, :-100]
+        avg_100 = (csum - lagged) / window
+
+        n_solved  += int((avg_100 >= SOLVE_THRESHOLD).any(axis=1).sum())
+        final_sum += float(avg_100[:, -1].sum())
+    elapsed = time.time() - start
+
+    console.print()
+    console.rule("[bold cyan]Local Results[/]")
+    console.print(f"  Total sandboxes : [bold]{n}[/] ([bold]{n * episodes}[/] episodes, {steps} steps)")
+    console.print(f"  Solved CartPole : [bold yellow]{n_solved}[/] ({round(n_solved / n * 100, 1)}%)")
+    console.print(f"  Avg final score : [bold magenta]{round(final_sum / n, 1)}[/]")
+    console.print(f"  Wall time       : [bold cyan]{round(elapsed, 2)}s[/]"
+                  f"  ([bold]{round(n * episodes / max(elapsed, 1e-9))}[/] episodes/s)")
+    console.print()
+
+
 def main():
     parser = argparse.ArgumentParser(description="Harbor + Daytona CartPole Demo")
     parser.add_argument("--sandboxes", type=int, default=25,
@@ -43,15 +79,32 @@ def main():
     parser.add_argument("--episodes",  type=int, default=300,
                         help="Training episodes per sandbox (default: 300)")
     parser.add_argument("--workers",    type=int, default=None,
-                        help="Max parallel threads (default: min(sandboxes, 200))")
+                        help="Max sandboxes in flight at once (default: min(sandboxes, 200))")
     parser.add_argument("--batch-size", type=int, default=25,
                         help="Sandboxes to launch per batch (default: 25)")
     parser.add_argument("--batch-delay", type=float, default=3.0,
                         help="Seconds to wait between batches (default: 3)")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Seed for the per-sandbox learning-rate draw (default: 0)")
+    parser.add_argument("--snapshot", default=None,
+                        help="Pre-built snapshot with the task baked in, built on first use "
+                             "(default: cartpole-task-<script + image hash>)")
+    parser.add_argument("--stock-snapshot", action="store_true",
+                        help="Use the stock Daytona snapshot and pip install deps in every sandbox")
     parser.add_argument("--cleanup", action="store_true",
                         help="Delete all running sandboxes and exit")
+    parser.add_argument("--local", action="store_true",
+                        help="Run the whole workload in this process instead of in sandboxes")
     args = parser.parse_args()
 
+    if args.local:
+        run_local(args.sandboxes, args.episodes)
+        sys.exit(0)
+
+    # Imported only now: the SDK takes seconds to import, which --local skips
+    from daytona_sdk import Daytona, DaytonaConfig
+    from sandbox import ensure_snapshot, orchestrate
+
     if not API_KEY:
         console.print("[bold red]Error:[/] Set DAYTONA_API_KEY environment variable.")
         console.print("  export DAYTONA_API_KEY=your_key_here")
@@ -86,31 +139,47 @@ def main():
 
     # Vary learning rates across sandboxes for interesting diversity
     lr_choices = [0.001, 0.005, 0.01, 0.02, 0.05]
-    lrs = [random.choice(lr_choices) for _ in range(n)]
+    lrs = random.Random(args.seed).choices(lr_choices, k=n)
 
     daytona_client = Daytona(DaytonaConfig(api_key=API_KEY))
     state = DemoState(total=n)
 
+    snapshot = None
+    if not args.stock_snapshot:
+        try:
+            with console.status("Preparing task snapshot..."):
+                snapshot = ensure_snapshot(daytona_client, args.snapshot)
+        except Exception as e:
+            console.print(f"[bold yellow]Warning:[/] snapshot unavailable ({e}); "
+                          "falling back to per-sandbox pip install.")
+
+    def render():
+        # Leave room for the panel border, padding, header and table heading
+        return build_dashboard(state, episodes, max_rows=max(10, console.size.height - 12))
+
     console.print("\n[bold cyan]Harbor + Daytona  ·  CartPole-v1 Distributed RL[/]")
     console.print(f"Spinning up [bold]{n}[/] sandboxes with [bold]{episodes}[/] episodes each...\n")
 
-    with Live(build_dashboard(state, episodes), refresh_per_second=4, console=console) as live:
-        with ThreadPoolExecutor(max_workers=workers) as executor:
-            futures = {}
-            indices = list(range(n))
-            for batch_start in range(0, n, batch_size):
-                batch = indices[batch_start:batch_start + batch_size]
-                for i in batch:
-                    futures[executor.submit(run_sandbox, i, state, daytona_client, episodes, lrs[i], task_code)] = i
-                if batch_start + batch_size < n:
-                    for _ in range(int(batch_delay / 0.25)):
-                        live.update(build_dashboard(state, episodes))
-                        time.sleep(0.25)
-            while any(f.running() for f in futures) or not all(f.done() for f in futures):
-                live.update(build_dashboard(state, episodes))
-                time.sleep(0.25)
-            # Final update after all done
-            live.update(build_dashboard(state, episodes))
+    async def drive(live: Live):
+        async def tick():
+            # Keep the elapsed clock ticking between sandbox completions
+            while True:
+                await asyncio.sleep(1.0)
+                live.update(render())
+
+        ticker = asyncio.create_task(tick())
+        try:
+            await orchestrate(
+                state, API_KEY, n, episodes, workers, batch_size, batch_delay, lrs, task_code, snapshot,
+                on_done=lambda: live.update(render()),
+            )
+        finally:
+            ticker.cancel()
+
+    with Live(render(), refresh_per_second=4, console=console) as live:
+        asyncio.run(drive(live))
+        # Final update after all done
+        live.update(render())
 
     # ── Final summary ─────────────────────────────────────────────────────
     n_done  = state.n_complete
@@ -133,8 +202,9 @@ def main():
 
         log_path = Path(__file__).parent / "errors.log"
         with log_path.open("w") as f:
-            for r in sorted((r for r in state.results.values() if r.status == "error"),
-                            key=lambda r: r.index):
+            for r in state.results:
+                if r.status != Status.ERROR:
+                    continue
                 f.write(f"[sandbox {r.index + 1}] id={r.sandbox_id}\n{r.error}\n\n")
         console.print(f"  Error details → [cyan]{log_path}[/]")
 
@@ -1,4 +1,4 @@
-from .sandbox_result import SandboxResult
+from .sandbox_result import SandboxResult, Status
 from .demo_state import DemoState
 
-__all__ = ["SandboxResult", "DemoState"]
+__all__ = ["SandboxResult", "Status", "DemoState"]
@@ -1,70 +1,122 @@
 import time
 from threading import Lock
 
-from .sandbox_result import SandboxResult
+from .sandbox_result import SandboxResult, Status
 
 
 class DemoState:
     def __init__(self, total: int):
         self.total      = total
-        self.results    = {}
+        # One pre-allocated row per sandbox, already in index order. Fields are
+        # written under `lock`; a reader on another thread must hold it too, or
+        # it can see a half-applied row (e.g. COMPLETE with the old avg_100).
+        # Readers on the writers' own thread (the CLI's event loop) need not.
+        self.results    = [SandboxResult(sandbox_id=f"sb-{i:05d}", index=i) for i in range(total)]
         self.lock       = Lock()
         self.start_time = time.time()
+        # Bumped by every mutator, so readers can tell when a cached view is stale
+        self.version    = 0
 
+        # Aggregates kept in step with `results` so the stats below are O(1)
+        self._counts    = [0] * len(Status)
+        self._counts[Status.PENDING] = total
+        self._n_solved  = 0
+        self._final_sum = 0.0
+
+    # ── Aggregate bookkeeping (call with self.lock held) ──────────────────
+    def _count(self, r: SandboxResult, sign: int = 1):
+        self._counts[r.status] += sign
+        if r.status == Status.COMPLETE:
+            # Progress payloads already report solved mid-run; only finished
+            # rows count, so "Solve %" (solved / complete) stays within 100%
+            if r.solved:
+                self._n_solved += sign
+            self._final_sum += sign * r.avg_100
+
+    def _uncount(self, r: SandboxResult):
+        self._count(r, -1)
+
+    # ── Mutators ──────────────────────────────────────────────────────────
     def update(self, index: int, sandbox_id: str, data: dict):
         with self.lock:
-            if index not in self.results:
-                self.results[index] = SandboxResult(sandbox_id=sandbox_id, index=index)
-            r = self.results[index]
-            r.sandbox_id = sandbox_id
-            if data.get("status") == "complete":
-                r.status    = "complete"
-                r.avg_100   = data.get("final_avg", 0)
-                r.best      = data.get("best", 0)
-                r.solved    = data.get("solved", False)
-                r.solved_at = data.get("solved_at")
-                r.elapsed_s = data.get("elapsed_s", 0)
-                r.lr        = data.get("lr", 0.01)
-            else:
-                r.status  = "running"
-                r.episode = data.get("episode", 0)
-                r.avg_100 = data.get("avg_100", 0)
-                r.solved  = data.get("solved", False)
+            self._apply(index, sandbox_id, data)
+            self.version += 1
+
+    def bulk_update(self, index: int, sandbox_id: str, payloads: list[dict]):
+        # Same as calling update() per payload, but takes the lock once
+        if not payloads:
+            return
+        with self.lock:
+            for data in payloads:
+                self._apply(index, sandbox_id, data)
+            self.version += 1
+
+    def _apply(self, index: int, sandbox_id: str, data: dict):
+        r = self.results[index]
+        self._uncount(r)
+        r.sandbox_id = sandbox_id
+        if data.get("status") == "error":
+            r.status = Status.ERROR
+            r.error  = data.get("msg", "")
+        elif data.get("status") == "complete":
+            r.status    = Status.COMPLETE
+            r.avg_100   = data.get("final_avg", 0)
+            r.best      = data.get("best", 0)
+            r.solved    = data.get("solved", False)
+            r.solved_at = data.get("solved_at")
+            r.elapsed_s = data.get("elapsed_s", 0)
+            r.lr        = data.get("lr", 0.01)
+        else:
+            r.status  = Status.RUNNING
+            r.episode = data.get("episode", 0)
+            r.avg_100 = data.get("avg_100", 0)
+            r.solved  = data.get("solved", False)
+        self._count(r)
 
     def mark_error(self, index: int, sandbox_id: str, msg: str):
         with self.lock:
-            if index not in self.results:
-                self.results[index] = SandboxResult(sandbox_id=sandbox_id, index=index)
-            self.results[index].status = "error"
-            self.results[index].error  = msg
+            r = self.results[index]
+            self._uncount(r)
+            r.sandbox_id = sandbox_id
+            r.status = Status.ERROR
+            r.error  = msg
+            self._count(r)
+            self.version += 1
 
     def mark_running(self, index: int, sandbox_id: str):
         with self.lock:
-            if index not in self.results:
-                self.results[index] = SandboxResult(sandbox_id=sandbox_id, index=index)
-            self.results[index].status = "running"
+            r = self.results[index]
+            self._uncount(r)
+            r.sandbox_id = sandbox_id
+            r.status = Status.RUNNING
+            self._count(r)
+            self.version += 1
 
     # ── Computed stats ────────────────────────────────────────────────────
     @property
     def n_complete(self):
-        return sum(1 for r in self.results.values() if r.status == "complete")
+        return self._counts[Status.COMPLETE]
 
     @property
     def n_running(self):
-        return sum(1 for r in self.results.values() if r.status == "running")
+        return self._counts[Status.RUNNING]
 
     @property
     def n_error(self):
-        return sum(1 for r in self.results.values() if r.status == "error")
+        return self._counts[Status.ERROR]
+
+    @property
+    def n_pending(self):
+        return self.total - self.n_complete - self.n_running - self.n_error
 
     @property
     def n_solved(self):
-        return sum(1 for r in self.results.values() if r.solved)
+        return self._n_solved
 
     @property
     def avg_final(self):
-        vals = [r.avg_100 for r in self.results.values() if r.status == "complete"]
-        return round(sum(vals) / len(vals), 1) if vals else 0.0
+        n = self._counts[Status.COMPLETE]
+        return round(self._final_sum / n, 1) if n else 0.0
 
     @property
     def elapsed(self):
@@ -1,12 +1,21 @@
 from dataclasses import dataclass
+from enum import IntEnum
 from typing import Optional
 
 
-@dataclass
+class Status(IntEnum):
+    # Small ints, so per-status tables can be plain tuples/lists indexed by status
+    PENDING  = 0
+    RUNNING  = 1
+    COMPLETE = 2
+    ERROR    = 3
+
+
+@dataclass(slots=True)
 class SandboxResult:
     sandbox_id:  str
     index:       int
-    status:      str = "pending"   # pending | running | complete | error
+    status:      Status = Status.PENDING
     episode:     int = 0
     avg_100:     float = 0.0
     best:        float = 0.0
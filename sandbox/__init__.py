@@ -1,3 +1,5 @@
-from .runner import run_sandbox
+from .orchestrator import orchestrate
+from .runner import run_sandbox_async
+from .snapshot import ensure_snapshot, task_snapshot_name
 
-__all__ = ["run_sandbox"]
+__all__ = ["orchestrate", "run_sandbox_async", "ensure_snapshot", "task_snapshot_name"]
@@ -0,0 +1,45 @@
+import asyncio
+from typing import Callable
+
+from daytona_sdk import AsyncDaytona, DaytonaConfig
+
+from models.demo_state import DemoState
+from .runner import run_sandbox_async
+
+
+async def orchestrate(
+    state: DemoState,
+    api_key: str,
+    n: int,
+    episodes: int,
+    workers: int,
+    batch_size: int,
+    batch_delay: float,
+    lrs: list[float],
+    task_code: str,
+    snapshot: str | None = None,
+    on_done: Callable[[], None] | None = None,
+):
+    """Run all `n` sandboxes on the current event loop, in paced batches.
+
+    `on_done`, if given, is called on the loop each time a sandbox finishes.
+    """
+    # One event loop drives every sandbox; the semaphore caps how many
+    # are in flight at once
+    sem = asyncio.Semaphore(workers)
+
+    async with AsyncDaytona(DaytonaConfig(api_key=api_key)) as daytona:
+        async def bounded(i: int):
+            async with sem:
+                await run_sandbox_async(i, state, daytona, episodes, lrs[i], task_code, snapshot)
+
+        tasks = []
+        for batch_start in range(0, n, batch_size):
+            batch = range(batch_start, min(batch_start + batch_size, n))
+            tasks.extend(asyncio.create_task(bounded(i)) for i in batch)
+            if batch_start + batch_size < n:
+                await asyncio.sleep(batch_delay)
+        for done in asyncio.as_completed(tasks):
+            await done
+            if on_done is not None:
+                on_done()
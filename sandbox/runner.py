@@ -1,61 +1,166 @@
+import asyncio
 import json
 
-from daytona_sdk import Daytona, CreateSandboxFromSnapshotParams as CreateSandboxParams
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+from daytona_sdk import (
+    AsyncDaytona,
+    CreateSandboxFromSnapshotParams as CreateSandboxParams,
+    SessionExecuteRequest,
+)
 
 from models.demo_state import DemoState
+from models.sandbox_result import Status
+from .snapshot import TASK_PATH
+
+STOCK_SNAPSHOT = "daytonaio/sandbox:0.6.0-slim-id"
+_HEREDOC_EOF   = "CARTPOLE_TASK_EOF"
+
+
+def _line_splitter(on_lines):
+    """Wrap `on_lines` in a callback that accepts arbitrary stdout chunks.
+
+    Each chunk's complete lines are handed over together, as one list of
+    bytes. Only the unterminated remainder is kept between chunks, in a
+    bytearray trimmed in place, so memory stays at about one line per sandbox.
+    """
+    tail = bytearray()
+
+    def feed(chunk: str | None = None):
+        # Called with no argument once the stream ends, to flush the last line
+        if chunk is None:
+            lines = [bytes(tail)]
+            tail.clear()
+        else:
+            tail.extend(chunk.encode())
+            lines, start = [], 0
+            while (nl := tail.find(b"\n", start)) != -1:
+                lines.append(bytes(tail[start:nl]))
+                start = nl + 1
+            del tail[:start]
+        if lines:
+            on_lines(lines)
+
+    return feed
+
+
+def _json_line_handler(state: DemoState, index: int, sandbox_id: str):
+    """Stdout chunk callback that applies the chunk's JSON lines to `state`.
+
+    Each progress line carries the row's full running state, so within a
+    chunk only the latest one needs to reach the shared state; terminal
+    payloads (complete/error) are always kept, in order.
+    """
+    def handle(lines: list[bytes]):
+        payloads, progress = [], None
+        for line in lines:
+            if line[:1] != b"{":
+                continue
+            try:
+                data = _loads(line)
+            except ValueError:  # json and orjson decode errors both subclass it
+                continue
+            if data.get("status") in ("complete", "error"):
+                if progress is not None:
+                    payloads.append(progress)
+                    progress = None
+                payloads.append(data)
+            else:
+                progress = data
+        if progress is not None:
+            payloads.append(progress)
+        # One lock acquisition per chunk, however many lines it carried
+        state.bulk_update(index, sandbox_id, payloads)
+
+    return _line_splitter(handle)
+
+
+def _sandbox_params(snapshot: str | None) -> CreateSandboxParams:
+    return CreateSandboxParams(
+        snapshot=snapshot or STOCK_SNAPSHOT,
+        language="python",
+        auto_stop_interval=10,    # auto-stop 10 min after inactivity
+        auto_delete_interval=30,  # auto-delete 30 min after stopped
+    )
+
 
+def _task_command(
+    script: str, sandbox_id: str, episodes: int, lr: float, task_code: str | None = None,
+) -> SessionExecuteRequest:
+    # Without the task snapshot the script isn't on disk yet: write it from a
+    # heredoc in the same command, so it costs no separate upload round trip
+    command = f"python {script} {sandbox_id} {episodes} {lr}"
+    if task_code is not None:
+        command = f"cat > {script} <<'{_HEREDOC_EOF}'\n{task_code}\n{_HEREDOC_EOF}\n{command}"
+    return SessionExecuteRequest(command=command, run_async=True)
 
-def run_sandbox(
+
+def _check_exit(exit_code: int | None, stderr: list[str], finished: bool):
+    tail = "".join(stderr)[-2000:]
+    if exit_code:
+        raise RuntimeError(f"cartpole_task.py exited with {exit_code}\n{tail}")
+    if not finished:
+        # No exit code (e.g. the log stream closed before it was stored) and no
+        # final payload either: don't leave the row 'running' forever
+        raise RuntimeError(f"cartpole_task.py exited without a result\n{tail}")
+
+
+async def run_sandbox_async(
     index: int,
     state: DemoState,
-    daytona: Daytona,
+    daytona: AsyncDaytona,
     episodes: int,
     lr: float,
     task_code: str,
+    snapshot: str | None = None,
 ):
+    """Run cartpole_task.py in a fresh sandbox, streaming its results into `state`."""
     sandbox = None
     sandbox_id = f"sb-{index:05d}"
     try:
-        # Create sandbox
-        sandbox = daytona.create(CreateSandboxParams(
-            snapshot="daytonaio/sandbox:0.6.0-slim-id",
-            language="python",
-            auto_stop_interval=10,    # auto-stop 10 min after inactivity
-            auto_delete_interval=30,  # auto-delete 30 min after stopped
-        ))
+        sandbox = await daytona.create(_sandbox_params(snapshot))
         sandbox_id = sandbox.id
         state.mark_running(index, sandbox_id)
 
-        # Upload task script
-        sandbox.fs.upload_file(
-            task_code.encode(),
-            "/home/daytona/cartpole_task.py",
-        )
+        # The task snapshot ships numpy and the script; the stock one needs
+        # numpy installed and the script written by the run command
+        script = TASK_PATH
+        inline = None
+        if snapshot is None:
+            script = "/home/daytona/cartpole_task.py"
+            inline = task_code
+            await sandbox.process.exec("pip install numpy --quiet", timeout=120)
 
-        # Install gymnasium
-        sandbox.process.exec("pip install gymnasium --quiet", timeout=120)
+        # Run training in a session and feed each JSON line to the dashboard
+        # as soon as the task prints it
+        session_id = f"cartpole-{index}"
+        await sandbox.process.create_session(session_id)
+        cmd = await sandbox.process.execute_session_command(
+            session_id, _task_command(script, sandbox_id, episodes, lr, inline),
+        )
 
-        # Run training — capture stdout line by line
-        response = sandbox.process.exec(
-            f"python /home/daytona/cartpole_task.py {sandbox_id} {episodes} {lr}",
+        on_stdout = _json_line_handler(state, index, sandbox_id)
+        stderr = []
+        await asyncio.wait_for(
+            sandbox.process.get_session_command_logs_async(
+                session_id, cmd.cmd_id, on_stdout, stderr.append,
+            ),
             timeout=30,
         )
+        on_stdout()
 
-        # Parse JSON lines from stdout
-        for line in (response.result or "").splitlines():
-            line = line.strip()
-            if line.startswith("{"):
-                try:
-                    data = json.loads(line)
-                    state.update(index, sandbox_id, data)
-                except json.JSONDecodeError:
-                    pass
+        exit_code = (await sandbox.process.get_session_command(session_id, cmd.cmd_id)).exit_code
+        _check_exit(exit_code, stderr, state.results[index].status in (Status.COMPLETE, Status.ERROR))
 
     except Exception as e:
-        state.mark_error(index, sandbox_id, str(e))
+        state.mark_error(index, sandbox_id, str(e) or type(e).__name__)
     finally:
         if sandbox:
             try:
-                daytona.delete(sandbox)
+                await daytona.delete(sandbox)
             except Exception:
                 pass
@@ -0,0 +1,60 @@
+import hashlib
+from pathlib import Path
+
+from daytona_api_client import SnapshotState  # the SDK's own API models; not re-exported
+from daytona_sdk import CreateSnapshotParams, Daytona, DaytonaError, DaytonaNotFoundError, Image
+
+TASK_SCRIPT = Path(__file__).parent.parent / "cartpole_task.py"
+TASK_PATH   = "/opt/cartpole_task.py"
+
+
+def task_snapshot_name() -> str:
+    # Tagged with a hash of the script and the image spec, so editing the task,
+    # its deps or the base image yields a fresh snapshot. COPY lines name the
+    # local checkout path, so they're left out; the script bytes and TASK_PATH
+    # already cover what they copy.
+    spec = "\n".join(
+        line for line in task_image().dockerfile().splitlines() if not line.startswith("COPY ")
+    )
+    digest = hashlib.sha256(TASK_SCRIPT.read_bytes())
+    digest.update(f"\n{TASK_PATH}\n{spec}".encode())
+    return f"cartpole-task-{digest.hexdigest()[:12]}"
+
+
+def task_image() -> Image:
+    # The task's deps plus the script itself, so sandboxes skip pip and the upload
+    return (
+        Image.debian_slim("3.13")
+        .pip_install(["numpy", "orjson"])
+        .add_local_file(TASK_SCRIPT, TASK_PATH)
+        .workdir("/home/daytona")
+    )
+
+
+def ensure_snapshot(daytona: Daytona, name: str | None = None) -> str:
+    """Build the task snapshot on first use; later runs reuse it by name.
+
+    Raises DaytonaError unless the snapshot is ACTIVE, so callers can fall back
+    to the stock image instead of creating sandboxes from an unusable one.
+    """
+    name = name or task_snapshot_name()
+    try:
+        snapshot = daytona.snapshot.get(name)
+    except DaytonaNotFoundError:
+        snapshot = None
+
+    if snapshot is not None and snapshot.state in (SnapshotState.ERROR, SnapshotState.BUILD_FAILED):
+        # A failed build stays registered under its name; clear it and retry
+        daytona.snapshot.delete(snapshot)
+        snapshot = None
+    elif snapshot is not None and snapshot.state == SnapshotState.INACTIVE:
+        snapshot = daytona.snapshot.activate(snapshot)
+
+    if snapshot is None:
+        # create() waits for the build and raises if it fails
+        snapshot = daytona.snapshot.create(CreateSnapshotParams(name=name, image=task_image()))
+
+    if snapshot.state != SnapshotState.ACTIVE:
+        # e.g. still PENDING/BUILDING for another session
+        raise DaytonaError(f"Snapshot {name} is {snapshot.state}, not active")
+    return name
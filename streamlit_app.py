@@ -1,10 +1,11 @@
+import asyncio
 import os
-import random
 import threading
-import time
 from concurrent.futures import ThreadPoolExecutor
+from operator import attrgetter
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 import streamlit as st
 from dotenv import load_dotenv
@@ -16,125 +17,47 @@ load_dotenv()
 ASSETS = Path(__file__).parent / "assets"
 
 from models import DemoState
-from sandbox import run_sandbox
+from sandbox import ensure_snapshot, orchestrate
 
 TASK_SCRIPT = Path(__file__).parent / "cartpole_task.py"
 
+# ── Cached resources ───────────────────────────────────────────────────────────
+@st.cache_resource(show_spinner=False)
+def _icon() -> Image.Image:
+    # Decoded once per server instead of on every rerun
+    return Image.open(ASSETS / "main_daytona_logo.png")
+
+
+@st.cache_resource(show_spinner=False)
+def _client(api_key: str) -> Daytona:
+    # One sync client per API key, reused for snapshot checks and Kill All
+    return Daytona(DaytonaConfig(api_key=api_key))
+
+
+@st.cache_resource(show_spinner=False)
+def _task_code() -> str:
+    # Read once per server; only stock-image sandboxes need it, written into
+    # the run command's heredoc as-is
+    return TASK_SCRIPT.read_text()
+
+
 # ── Page config ────────────────────────────────────────────────────────────────
 st.set_page_config(
     page_title="Daytona · CartPole RL Demo",
-    page_icon=Image.open(ASSETS / "main_daytona_logo.png"),
+    page_icon=_icon(),
     layout="wide",
     initial_sidebar_state="expanded",
 )
 
 # ── Theme CSS ──────────────────────────────────────────────────────────────────
-st.markdown("""
-<style>
-/* ── Base ── */
-.stApp { background-color: #0D0D0D; color: #E0E0E0; }
-.stApp * { font-family: 'Inter', 'Helvetica Neue', sans-serif; }
-
-/* ── Sidebar ── */
-[data-testid="stSidebar"] {
-    background-color: #111111;
-    border-right: 1px solid #00C8FF22;
-}
-[data-testid="stSidebar"] .stMarkdown h1,
-[data-testid="stSidebar"] .stMarkdown h2 { color: #00C8FF; }
-
-/* ── Metric cards ── */
-[data-testid="stMetric"] {
-    background-color: #161616;
-    border: 1px solid #00C8FF22;
-    border-radius: 8px;
-    padding: 14px 18px;
-}
-[data-testid="stMetricValue"] {
-    color: #00C8FF;
-    font-size: 1.7rem !important;
-    font-weight: 700;
-}
-[data-testid="stMetricLabel"] {
-    color: #666;
-    font-size: 0.72rem !important;
-    text-transform: uppercase;
-    letter-spacing: 0.08em;
-}
-
-/* ── Buttons ── */
-[data-testid="stSidebar"] .stButton > button[kind="primary"],
-[data-testid="stSidebar"] .stButton > button {
-    background-color: #00C8FF;
-    color: #000;
-    border: none;
-    font-weight: 700;
-    border-radius: 6px;
-    width: 100%;
-}
-[data-testid="stSidebar"] .stButton > button:hover { background-color: #00A8D8; }
-[data-testid="stSidebar"] .stButton > button[kind="secondary"] {
-    background-color: transparent;
-    color: #FF4444;
-    border: 1px solid #FF444466;
-}
-[data-testid="stSidebar"] .stButton > button[kind="secondary"]:hover {
-    background-color: #FF444411;
-}
-
-/* ── Progress bar ── */
-[data-testid="stProgressBar"] > div > div { background-color: #00C8FF !important; }
-[data-testid="stProgressBar"] > div { background-color: #1A1A1A !important; }
-
-/* ── Dataframe ── */
-[data-testid="stDataFrame"] {
-    border: 1px solid #00C8FF22;
-    border-radius: 8px;
-    overflow: hidden;
-}
-[data-testid="stDataFrame"] table { background-color: #111111 !important; }
-[data-testid="stDataFrame"] th {
-    background-color: #0D0D0D !important;
-    color: #00C8FF !important;
-    font-size: 0.72rem !important;
-    text-transform: uppercase;
-    letter-spacing: 0.08em;
-    border-bottom: 1px solid #00C8FF33 !important;
-}
-[data-testid="stDataFrame"] td { color: #CCC !important; }
-
-/* ── Divider ── */
-hr { border-color: #222 !important; }
-
-/* ── Inputs ── */
-.stTextInput input, .stNumberInput input, .stSelectbox select {
-    background-color: #1A1A1A !important;
-    color: #E0E0E0 !important;
-    border: 1px solid #333 !important;
-    border-radius: 6px !important;
-}
-.stSlider [data-testid="stSliderTrack"] { background-color: #00C8FF !important; }
-
-/* ── Status badges ── */
-.badge-running  { color: #00C8FF; font-weight: 700; }
-.badge-complete { color: #00FF88; font-weight: 700; }
-.badge-idle     { color: #555;    font-weight: 700; }
-
-/* ── Page title ── */
-.page-title {
-    font-size: 1.4rem;
-    font-weight: 700;
-    color: #00C8FF;
-    letter-spacing: 0.06em;
-    margin-bottom: 0.1rem;
-}
-.page-sub {
-    font-size: 0.82rem;
-    color: #555;
-    margin-bottom: 1.2rem;
-}
-</style>
-""", unsafe_allow_html=True)
+@st.cache_resource
+def _theme_css() -> str:
+    # Read once per server; the <style> element itself still has to be emitted
+    # on every rerun, or Streamlit drops it from the page
+    return f"<style>\n{(ASSETS / 'theme.css').read_text()}</style>"
+
+
+st.markdown(_theme_css(), unsafe_allow_html=True)
 
 
 # ── Session state init ─────────────────────────────────────────────────────────
@@ -143,7 +66,7 @@ def _init():
         "state":          None,
         "thread":         None,
         "running":        False,
-        "daytona_client": None,
+        "df_cache":       (None, -1, None),  # (state, version, DataFrame)
     }
     for k, v in defaults.items():
         if k not in st.session_state:
@@ -154,48 +77,54 @@ ss = st.session_state
 
 
 # ── Background worker ──────────────────────────────────────────────────────────
-def _run_demo(state, client, n, episodes, workers, batch_size, batch_delay, lrs, task_code):
-    indices = list(range(n))
-    with ThreadPoolExecutor(max_workers=workers) as executor:
-        futures = {}
-        for batch_start in range(0, n, batch_size):
-            batch = indices[batch_start:batch_start + batch_size]
-            for i in batch:
-                futures[executor.submit(
-                    run_sandbox, i, state, client, episodes, lrs[i], task_code
-                )] = i
-            if batch_start + batch_size < n:
-                time.sleep(batch_delay)
-        for f in futures:
-            try:
-                f.result()
-            except Exception:
-                pass
+def _run_demo(*args):
+    # Runs on the background thread, which owns the event loop for this run
+    asyncio.run(orchestrate(*args))
 
 
 # ── Helpers ────────────────────────────────────────────────────────────────────
+def _delete_all(client: Daytona, sandboxes: list):
+    # Deletes are independent HTTP calls, so fan them out instead of paying
+    # one round trip per sandbox in sequence
+    def delete(s):
+        try:
+            client.delete(s)
+        except Exception:
+            pass
+
+    if sandboxes:
+        with ThreadPoolExecutor(max_workers=min(len(sandboxes), 64)) as pool:
+            list(pool.map(delete, sandboxes))
+
+
+# Display label per Status, indexed by its value
+STATUS_LABELS = np.array(["... pending", "> running", "+ done", "x error"])
+_FIELDS = attrgetter("index", "sandbox_id", "status", "episode", "avg_100", "best", "solved", "lr")
+
+
 def _build_df(state: DemoState) -> pd.DataFrame:
-    status_label = {
-        "pending":  "... pending",
-        "running":  "> running",
-        "complete": "+ done",
-        "error":    "x error",
-    }
+    # Copy the raw fields out under the lock, then format whole columns at once
     with state.lock:
-        rows = [
-            {
-                "#":          str(r.index + 1),
-                "Sandbox ID": (r.sandbox_id[:14] + "...") if len(r.sandbox_id) > 14 else r.sandbox_id,
-                "Status":     status_label.get(r.status, r.status),
-                "Episode":    str(r.episode)  if r.episode  else "-",
-                "Avg(100)":   str(r.avg_100)  if r.avg_100  else "-",
-                "Best":       str(r.best)     if r.best     else "-",
-                "Solved":     "yes" if r.solved else "-",
-                "LR":         str(r.lr)       if r.lr       else "-",
-            }
-            for r in sorted(state.results.values(), key=lambda r: r.index)
-        ]
-    return pd.DataFrame(rows)
+        records = list(map(_FIELDS, state.results))
+    raw = pd.DataFrame.from_records(
+        records, columns=["index", "sandbox_id", "status", "episode", "avg_100", "best", "solved", "lr"],
+    )
+
+    def or_dash(col: str) -> pd.Series:
+        # Unset (zero) fields render as "-"
+        return raw[col].astype(str).where(raw[col] != 0, "-")
+
+    sid = raw["sandbox_id"]
+    return pd.DataFrame({
+        "#":          (raw["index"] + 1).astype(str),
+        "Sandbox ID": sid.where(sid.str.len() <= 14, sid.str[:14] + "..."),
+        "Status":     STATUS_LABELS[raw["status"].to_numpy(dtype=int)],
+        "Episode":    or_dash("episode"),
+        "Avg(100)":   or_dash("avg_100"),
+        "Best":       or_dash("best"),
+        "Solved":     np.where(raw["solved"], "yes", "-"),
+        "LR":         or_dash("lr"),
+    })
 
 
 # ── Sidebar ────────────────────────────────────────────────────────────────────
@@ -223,20 +152,27 @@ with st.sidebar:
     run_col, kill_col = st.columns(2)
     with run_col:
         if st.button("Run", disabled=ss.running or not api_key, width="stretch"):
-            task_code  = TASK_SCRIPT.read_text()
-            lr_choices = [0.001, 0.005, 0.01, 0.02, 0.05]
-            lrs        = [random.choice(lr_choices) for _ in range(n_sandboxes)]
+            task_code  = _task_code()
+            lr_choices = np.array([0.001, 0.005, 0.01, 0.02, 0.05])
+            lrs        = np.random.default_rng().choice(lr_choices, size=n_sandboxes).tolist()
             workers    = min(n_sandboxes, 200)
-            client     = Daytona(DaytonaConfig(api_key=api_key))
 
-            ss.daytona_client = client
-            ss.state          = DemoState(total=n_sandboxes)
-            ss.running        = True
+            # Sandboxes start from the pre-baked task snapshot (built on first
+            # use) so none of them pays for pip install or the script upload
+            try:
+                with st.spinner("Preparing task snapshot..."):
+                    snapshot = ensure_snapshot(_client(api_key))
+            except Exception as e:
+                snapshot = None
+                st.toast(f"Snapshot unavailable ({e}); falling back to per-sandbox pip install.")
+
+            ss.state   = DemoState(total=n_sandboxes)
+            ss.running = True
 
             t = threading.Thread(
                 target=_run_demo,
-                args=(ss.state, client, n_sandboxes, episodes, workers,
-                      batch_size, batch_delay, lrs, task_code),
+                args=(ss.state, api_key, n_sandboxes, episodes, workers,
+                      batch_size, batch_delay, lrs, task_code, snapshot),
                 daemon=True,
             )
             ss.thread = t
@@ -247,13 +183,9 @@ with st.sidebar:
         if st.button("Kill All", width="stretch", type="secondary"):
             if api_key:
                 with st.spinner("Deleting..."):
-                    client = Daytona(DaytonaConfig(api_key=api_key))
+                    client = _client(api_key)
                     result = client.list()
-                    for s in result.items:
-                        try:
-                            client.delete(s)
-                        except Exception:
-                            pass
+                    _delete_all(client, result.items)
                 st.success(f"Deleted {result.total} sandbox(es).")
 
 
@@ -280,13 +212,29 @@ if ss.state is None:
     inf_l, inf_c, inf_r = st.columns([1, 2, 1])
     with inf_c:
         st.image(str(ASSETS / "green_infinity_rectangle.png"), caption="Scale to thousands of sandboxes")
-elif ss.running:
-    st.markdown(f'<span class="badge-running">● RUNNING</span>&nbsp; {ss.state.elapsed}s elapsed', unsafe_allow_html=True)
-else:
-    st.markdown(f'<span class="badge-complete">● COMPLETE</span>&nbsp; finished in {ss.state.elapsed}s', unsafe_allow_html=True)
 
-if ss.state is not None:
-    state  = ss.state
+
+def _poll_interval(state: DemoState) -> float:
+    # Tight while sandboxes are streaming, slow between batches
+    return 0.25 if state.n_running else 2.0
+
+
+def _live_panel(interval: float | None):
+    """Badge, metrics, progress and table; reruns alone on a timer while running."""
+    state = ss.state
+    if ss.running and not ss.thread.is_alive():
+        # Run finished: a full rerun re-enables Run and stops the timer
+        ss.running = False
+        st.rerun()
+    if ss.running and _poll_interval(state) != interval:
+        # Started or stopped streaming: a full rerun reschedules at the new rate
+        st.rerun()
+
+    if ss.running:
+        st.markdown(f'<span class="badge-running">● RUNNING</span>&nbsp; {state.elapsed}s elapsed', unsafe_allow_html=True)
+    else:
+        st.markdown(f'<span class="badge-complete">● COMPLETE</span>&nbsp; finished in {state.elapsed}s', unsafe_allow_html=True)
+
     n      = state.total
     n_done = state.n_complete
     n_run  = state.n_running
@@ -309,7 +257,15 @@ if ss.state is not None:
     st.divider()
 
     # ── Results table ──
-    df = _build_df(state)
+    # Rebuilt only when the state has changed since the last run; keyed on the
+    # state object itself, as an id() can be reused by a new run whose version
+    # restarts at 0. The cached frame is still redrawn: Streamlit clears any
+    # element a fragment run doesn't re-emit.
+    cached_state, cached_version, df = ss.df_cache
+    version = state.version
+    if cached_state is not state or cached_version != version:
+        df = _build_df(state)
+        ss.df_cache = (state, version, df)
     if not df.empty:
         st.dataframe(
             df,
@@ -328,7 +284,10 @@ if ss.state is not None:
             },
         )
 
+
 # ── Live polling ───────────────────────────────────────────────────────────────
-if ss.running:
-    time.sleep(0.5)
-    st.rerun()
+# The panel is a fragment on a browser-driven timer, so widget events (Kill All,
+# sidebar edits) are handled between ticks instead of waiting out a server sleep
+if ss.state is not None:
+    interval = _poll_interval(ss.state) if ss.running else None
+    st.fragment(run_every=interval)(_live_panel)(interval)